@@ -1,31 +1,44 @@
 from __future__ import annotations
 
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
-from pydantic import Field
-from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
-PROJECT_ROOT = Path(__file__).resolve().parents[1]
-_DEFAULT_DATA_DIR = Path("/data") if Path("/data").exists() else (PROJECT_ROOT / "data")
+PROJECT_ROOT = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# A Render persistent disk mounted at /data; checked once at import.
+_HAS_RENDER_DISK = os.path.exists("/data")
+_DEFAULT_DATA_DIR = Path("/data") if _HAS_RENDER_DISK else (PROJECT_ROOT / "data")
 DATA_DIR = Path(os.getenv("DATA_DIR", str(_DEFAULT_DATA_DIR)))
 
 
 def _default_database_url() -> str:
     # If a Render persistent disk is mounted at /data, use it automatically.
-    if Path("/data").exists():
+    if _HAS_RENDER_DISK:
         return "sqlite:////data/app.db"
     return "sqlite:///./data/app.db"
 
 
-class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=str(PROJECT_ROOT / ".env"), extra="ignore")
-
-    database_url: str = Field(default_factory=_default_database_url)
+@dataclass(frozen=True, slots=True)
+class Settings:
+    database_url: str
     update_interval_minutes: int = 60
 
+    @classmethod
+    def from_env(cls) -> Settings:
+        return cls(
+            database_url=os.getenv("DATABASE_URL") or _default_database_url(),
+            update_interval_minutes=int(os.getenv("UPDATE_INTERVAL_MINUTES", "60")),
+        )
+
 
 load_dotenv(PROJECT_ROOT / ".env")
-settings = Settings()
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings are read once per process; later calls return the cached instance."""
+    return Settings.from_env()
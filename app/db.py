@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from collections.abc import AsyncIterator, Iterator
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine.url import make_url
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
-from app.config import DATA_DIR, settings
+from app.config import DATA_DIR, get_settings
 
 
 class Base(DeclarativeBase):
@@ -27,11 +30,41 @@ def _normalize_database_url(db_url: str) -> str:
     return db_url
 
 
+def dialect_insert(session: Session, model):
+    """INSERT construct for the session's dialect, so callers can use on_conflict_do_nothing()."""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+def _async_database_url(db_url: str) -> str:
+    # psycopg (v3) is async-capable under the same dialect name, so Postgres URLs are
+    # reused as-is; SQLite needs the aiosqlite driver.
+    if db_url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + db_url.removeprefix("sqlite:")
+    return db_url
+
 
-db_url = _normalize_database_url(settings.database_url)
+db_url = _normalize_database_url(get_settings().database_url)
 _ensure_sqlite_dir(db_url)
 
-connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
+engine_kwargs: dict = {"future": True}
+if db_url.startswith("sqlite"):
+    engine_kwargs["connect_args"] = {"check_same_thread": False}
+else:
+    # Hosted Postgres drops idle connections; pre-ping + recycle avoid first-request
+    # stalls on a dead socket, and LIFO keeps a small set of connections warm.
+    # The sync and async engines below both get these settings, so each worker's
+    # budget of 30 connections is split evenly between them.
+    engine_kwargs.update(
+        pool_size=5,
+        max_overflow=10,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        pool_use_lifo=True,
+    )
 
 try:
     safe_url = make_url(db_url).set(password="***")
@@ -39,7 +72,72 @@ except Exception:
     safe_url = "<invalid DATABASE_URL>"
 
 try:
-    engine = create_engine(db_url, future=True, connect_args=connect_args)
+    engine = create_engine(db_url, **engine_kwargs)
 except Exception as exc:
     raise RuntimeError(f"Failed to create SQLAlchemy engine for {safe_url}") from exc
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+# WAL lets readers proceed while the updater writes; synchronous=NORMAL is safe under WAL
+# and avoids an fsync per commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+
+def sqlite_journal_mode() -> str | None:
+    """The journal mode SQLite actually applied (None for other databases)."""
+    if not db_url.startswith("sqlite"):
+        return None
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+
+
+# Async engine for read-heavy request handlers; the scheduler/updater keep the sync engine.
+async_db_url = _async_database_url(db_url)
+try:
+    async_engine = create_async_engine(async_db_url, **engine_kwargs)
+except Exception as exc:
+    raise RuntimeError(f"Failed to create async SQLAlchemy engine for {safe_url}") from exc
+
+if db_url.startswith("sqlite"):
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
+
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_session() -> Iterator[Session]:
+    """FastAPI dependency: one session per request, rolled back on error, always closed."""
+    session = SessionLocal()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of `get_session` for `async def` handlers."""
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
@@ -1,31 +1,62 @@
 from __future__ import annotations
 
+import logging
+import logging.handlers
+import os
+import queue
+import sys
 import threading
 from pathlib import Path
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
-from starlette.responses import FileResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse, Response
 
-from app.db import engine
-from app.models import Base
+from app.db import SessionLocal, sqlite_journal_mode
 from app.routes.api import router as api_router
 from app.routes.home import router as home_router
 from app.routes.industries import router as industries_router
 from app.routes.stocks import router as stocks_router
-from app.seed import seed_defaults
-from app.services.scheduler import start_scheduler
 from app.services.updater import finnhub_update_prices
 
 
+logger = logging.getLogger(__name__)
+
+
+def _configure_logging() -> logging.handlers.QueueListener:
+    """Send the `app.*` loggers through a queue; a listener thread does the stdout
+    writes, so the updater and request threads never wait on console I/O."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(logging.INFO)
+    app_logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    app_logger.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, stream)
+    listener.start()
+    return listener
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Stock Performance Tracker")
+    app = FastAPI(title="Stock Performance Tracker", default_response_class=ORJSONResponse)
     static_dir = Path(__file__).resolve().parent / "static"
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
     # Serve built React frontend (if available)
     frontend_dist = Path(__file__).resolve().parent.parent / "frontend" / "dist"
     if frontend_dist.exists():
+        # The build output is fixed for the life of the process: index it once so requests
+        # resolve static files with a set lookup instead of a stat() per request.
+        static_files = frozenset(
+            p.relative_to(frontend_dist).as_posix() for p in frontend_dist.rglob("*") if p.is_file()
+        )
+        index_file = frontend_dist / "index.html"
+        index_html = index_file.read_bytes() if index_file.is_file() else None
 
         @app.middleware("http")
         async def spa_fallback(request, call_next):
@@ -33,18 +64,18 @@ def create_app() -> FastAPI:
             if request.url.path.startswith(("/api", "/static", "/update-now", "/backfill-now")):
                 return await call_next(request)
             # Try static file from frontend/dist
-            try:
-                file_path = frontend_dist / request.url.path.lstrip("/")
-                if file_path.is_file():
-                    return FileResponse(file_path)
-            except Exception:
-                pass
+            rel_path = request.url.path.lstrip("/")
+            if rel_path in static_files:
+                return FileResponse(frontend_dist / rel_path)
             # Fallback to index.html for SPA client routing
-            index_file = frontend_dist / "index.html"
-            if index_file.exists():
-                return FileResponse(index_file, media_type="text/html")
+            if index_html is not None:
+                return Response(index_html, media_type="text/html")
             return await call_next(request)
 
+    # Added last so it wraps everything, including SPA responses from the fallback above.
+    # JSON and HTML here are highly repetitive; level 5 trades little CPU for most of the ratio.
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
     app.include_router(api_router)
     app.include_router(home_router)
     app.include_router(stocks_router)
@@ -52,30 +83,34 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     def _startup() -> None:
-        Base.metadata.create_all(bind=engine)
+        app.state.log_listener = _configure_logging()
+
+        # journal_mode=WAL silently stays "delete" on filesystems without shared memory.
+        journal_mode = sqlite_journal_mode()
+        if journal_mode is not None and journal_mode.lower() != "wal":
+            logger.warning("SQLite journal_mode is %s, expected wal", journal_mode)
+
+        # Imported here so apscheduler and the seed data load only when serving.
+        from app.services.scheduler import start_scheduler
 
-        from app.db import SessionLocal
+        # Schema + seed normally run once per deploy (`python -m app.migrate`, see
+        # render-start.sh); workers skip it unless RUN_MIGRATIONS is set.
+        if os.getenv("RUN_MIGRATIONS"):
+            from app.migrate import migrate
 
-        session = SessionLocal()
-        try:
-            seed_defaults(session)
-            session.commit()
-        finally:
-            session.close()
+            migrate()
 
         app.state.scheduler = start_scheduler()
 
         def _initial_update() -> None:
-            import os
             # Skip auto-update on Render or when explicitly disabled to avoid rate limits
             if os.getenv("PORT") or os.getenv("DISABLE_STARTUP_UPDATE"):
-                print("[startup] Skipping initial update (running on Render or DISABLE_STARTUP_UPDATE set)")
+                logger.info("Skipping initial update (running on Render or DISABLE_STARTUP_UPDATE set)")
                 return
-            from app.db import SessionLocal
 
             s = SessionLocal()
             try:
-                finnhub_update_prices(s, delay_seconds=1.0)
+                finnhub_update_prices(s)
             finally:
                 s.close()
 
@@ -86,6 +121,9 @@ def create_app() -> FastAPI:
         sched = getattr(app.state, "scheduler", None)
         if sched is not None:
             sched.shutdown(wait=False)
+        listener = getattr(app.state, "log_listener", None)
+        if listener is not None:
+            listener.stop()
 
     return app
 
@@ -0,0 +1,31 @@
+"""One-shot schema creation and seeding.
+
+Run once per deploy (``python -m app.migrate``) instead of in every worker's startup;
+set ``RUN_MIGRATIONS=1`` to have the web process do it itself (handy for local dev).
+"""
+from __future__ import annotations
+
+from app.db import SessionLocal, engine
+from app.models import Base, Stock
+from app.seed import seed_defaults
+from app.services.updater import invalidate_stock_cache
+
+
+def migrate() -> None:
+    Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist, so add any that an
+    # existing database predates.
+    for index in Stock.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+    session = SessionLocal()
+    try:
+        seed_defaults(session)
+        session.commit()
+        invalidate_stock_cache()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    migrate()
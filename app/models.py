@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import datetime as dt
 
-from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Boolean, Date, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, text
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
-from app.db import Base
+from app.db import Base, dialect_insert
 
 
 class Industry(Base):
@@ -19,13 +19,23 @@ class Industry(Base):
 
 class Stock(Base):
     __tablename__ = "stocks"
+    __table_args__ = (
+        Index("ix_stocks_industry_active", "industry_id", "active"),
+        # Partial index for the common `WHERE active` path (list views, updater).
+        Index(
+            "ix_stocks_active_industry",
+            "industry_id",
+            postgresql_where=text("active"),
+            sqlite_where=text("active"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     ticker: Mapped[str] = mapped_column(String(30), unique=True, index=True)
     name: Mapped[str] = mapped_column(String(200))
     active: Mapped[bool] = mapped_column(Boolean, default=True)
 
-    industry_id: Mapped[int] = mapped_column(ForeignKey("industries.id"), index=True)
+    industry_id: Mapped[int] = mapped_column(ForeignKey("industries.id"))
     industry: Mapped[Industry] = relationship(back_populates="stocks")
 
     purchase_date: Mapped[dt.date] = mapped_column(Date)
@@ -41,14 +51,36 @@ class Stock(Base):
 
 class PricePoint(Base):
     __tablename__ = "price_points"
+    # The unique constraint doubles as the (stock_id, observed_at) index used for
+    # per-stock range scans ordered by time, so stock_id needs no index of its own.
     __table_args__ = (
         UniqueConstraint("stock_id", "observed_at", name="uq_price_points_stock_time"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id"), index=True)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id"))
     observed_at: Mapped[dt.datetime] = mapped_column(DateTime(timezone=True), index=True)
     price: Mapped[float] = mapped_column(Float)
     currency: Mapped[str | None] = mapped_column(String(10), nullable=True)
 
     stock: Mapped[Stock] = relationship(back_populates="prices")
+
+    # Rows per INSERT statement; keeps bound parameters well under SQLite's limit.
+    BULK_PAGE_SIZE = 1000
+
+    @classmethod
+    def bulk_upsert(cls, session: Session, rows: list[dict]) -> int:
+        """Insert price points as multi-row INSERTs, letting the DB skip existing
+        (stock_id, observed_at) pairs instead of checking for them in Python.
+
+        Returns the number of rows actually inserted.
+        """
+        inserted = 0
+        for start in range(0, len(rows), cls.BULK_PAGE_SIZE):
+            stmt = (
+                dialect_insert(session, cls)
+                .values(rows[start : start + cls.BULK_PAGE_SIZE])
+                .on_conflict_do_nothing(index_elements=["stock_id", "observed_at"])
+            )
+            inserted += session.execute(stmt).rowcount
+        return inserted
@@ -1,112 +1,138 @@
 from __future__ import annotations
 
 import datetime as dt
-
-from fastapi import APIRouter
-from sqlalchemy import select
-
-from app.db import SessionLocal
-from app.models import Industry, Stock
-from app.services.updater import compute_return_abs, compute_return_pct, finnhub_update_prices, finnhub_backfill_history
+import threading
+import time
+from functools import lru_cache
+from operator import itemgetter
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db import get_async_session, get_session
+from app.models import Stock
+from app.services.performance import industry_performance_select, sort_pct, stock_rows_select
+from app.services.updater import (
+    compute_return_abs,
+    compute_return_pct,
+    data_version,
+    finnhub_backfill_history,
+    finnhub_update_prices,
+)
 
 
 router = APIRouter(prefix="/api", tags=["api"])
 
 
-def _iso(value) -> str | None:
+def _iso_dt(value: dt.datetime | None) -> str | None:
     if value is None:
         return None
-    if isinstance(value, (dt.date, dt.datetime)):
-        if isinstance(value, dt.datetime) and value.tzinfo is None:
-            # Treat naive datetimes as UTC for display.
-            value = value.replace(tzinfo=dt.timezone.utc)
-        return value.isoformat()
-    return str(value)
-
-
-@router.get("/summary")
-def summary() -> dict:
-    session = SessionLocal()
-    try:
-        stocks = session.execute(select(Stock).where(Stock.active == True)).scalars().all()  # noqa: E712
-        industries = session.execute(select(Industry)).scalars().all()
-
-        stock_rows: list[dict] = []
-        for s in stocks:
-            stock_rows.append(
-                {
-                    "id": s.id,
-                    "ticker": s.ticker,
-                    "name": s.name,
-                    "industry": s.industry.name if s.industry else None,
-                    "purchase_date": _iso(s.purchase_date),
-                    "purchase_price": s.purchase_price,
-                    "last_price": s.last_price,
-                    "last_price_at": _iso(s.last_price_at),
-                    "return_abs": compute_return_abs(s.purchase_price, s.last_price),
-                    "return_pct": compute_return_pct(s.purchase_price, s.last_price),
-                }
-            )
-
-        stock_rows = sorted(
-            stock_rows,
-            key=lambda r: (
-                r["return_pct"] is None,
-                -(float(r["return_pct"]) if r["return_pct"] is not None else 0.0),
-                r["ticker"],
-            ),
+    if value.tzinfo is None:
+        # Treat naive datetimes as UTC for display.
+        value = value.replace(tzinfo=dt.timezone.utc)
+    return value.isoformat()
+
+
+@lru_cache(maxsize=4096)
+def _iso_date(value: dt.date | None) -> str | None:
+    # Purchase dates repeat across the whole portfolio, so the formatted string is cached.
+    return None if value is None else value.isoformat()
+
+
+# Summary payload only changes when the updater writes prices, so it is cached
+# until the data version moves on (or the update interval elapses as a backstop).
+_summary_cache: dict = {"ts": 0.0, "version": None, "payload": None}
+_summary_lock = threading.Lock()
+
+
+def _cached_summary() -> dict | None:
+    ttl = get_settings().update_interval_minutes * 60
+    with _summary_lock:
+        if (
+            _summary_cache["payload"] is not None
+            and _summary_cache["version"] == data_version()
+            and time.monotonic() - _summary_cache["ts"] < ttl
+        ):
+            return _summary_cache["payload"]
+    return None
+
+
+async def _build_summary(session: AsyncSession) -> dict:
+    industries = (await session.execute(industry_performance_select(active_only=True))).all()
+    ind_name_by_id = {ind.id: ind.name for ind in industries}
+    stocks = (
+        await session.execute(stock_rows_select(with_industry=False).where(Stock.active == True))  # noqa: E712
+    ).all()
+
+    stock_rows: list[dict] = []
+    for s in stocks:
+        pct = compute_return_pct(s.purchase_price, s.last_price)
+        stock_rows.append(
+            {
+                "id": s.id,
+                "ticker": s.ticker,
+                "name": s.name,
+                "industry": ind_name_by_id.get(s.industry_id),
+                "purchase_date": _iso_date(s.purchase_date),
+                "purchase_price": s.purchase_price,
+                "last_price": s.last_price,
+                "last_price_at": _iso_dt(s.last_price_at),
+                "return_abs": compute_return_abs(s.purchase_price, s.last_price),
+                "return_pct": pct,
+                "_sort_pct": sort_pct(pct),
+            }
         )
 
-        industry_rows: list[dict] = []
-        for ind in industries:
-            ind_stocks = [s for s in stocks if s.industry_id == ind.id]
-            rets = [compute_return_pct(s.purchase_price, s.last_price) for s in ind_stocks]
-            rets = [r for r in rets if r is not None]
-            avg = (sum(rets) / len(rets)) if rets else None
-            industry_rows.append(
-                {
-                    "id": ind.id,
-                    "name": ind.name,
-                    "stock_count": len(ind_stocks),
-                    "avg_return_pct": avg,
-                }
-            )
-
-        industry_rows = sorted(
-            industry_rows,
-            key=lambda r: (
-                r["avg_return_pct"] is None,
-                -(float(r["avg_return_pct"]) if r["avg_return_pct"] is not None else 0.0),
-                r["name"],
-            ),
+    stock_rows.sort(key=itemgetter("_sort_pct", "ticker"))
+
+    industry_rows: list[dict] = []
+    for ind in industries:
+        industry_rows.append(
+            {
+                "id": ind.id,
+                "name": ind.name,
+                "stock_count": ind.stock_count,
+                "avg_return_pct": ind.avg_return_pct,
+                "_sort_pct": sort_pct(ind.avg_return_pct),
+            }
         )
 
-        return {
-            "now_utc": dt.datetime.now(dt.timezone.utc).isoformat(),
-            "stocks": stock_rows,
-            "industries": industry_rows,
-        }
-    finally:
-        session.close()
+    industry_rows.sort(key=itemgetter("_sort_pct", "name"))
+
+    # Sort keys are internal (and may be inf, which JSON cannot carry).
+    for r in stock_rows:
+        del r["_sort_pct"]
+    for r in industry_rows:
+        del r["_sort_pct"]
+    return {"stocks": stock_rows, "industries": industry_rows}
+
+
+@router.get("/summary")
+async def summary(session: AsyncSession = Depends(get_async_session)) -> ORJSONResponse:
+    payload = _cached_summary()
+    if payload is None:
+        # Read the version before querying so an update landing mid-build invalidates this entry.
+        version = data_version()
+        payload = await _build_summary(session)
+        with _summary_lock:
+            _summary_cache.update(ts=time.monotonic(), version=version, payload=payload)
+    # Returned as a response object so FastAPI skips jsonable_encoder; the payload is
+    # already plain JSON types.
+    return ORJSONResponse({"now_utc": dt.datetime.now(dt.timezone.utc).isoformat(), **payload})
 
 
 @router.post("/actions/update")
-def action_update() -> dict:
+def action_update(session: Session = Depends(get_session)) -> dict:
     """Update prices using Finnhub API (works from cloud servers)."""
-    session = SessionLocal()
-    try:
-        result = finnhub_update_prices(session, delay_seconds=1.0)
-        return {"ok": True, "result": result}
-    finally:
-        session.close()
+    result = finnhub_update_prices(session)
+    return {"ok": True, "result": result}
 
 
 @router.post("/actions/backfill")
-def action_backfill() -> dict:
+def action_backfill(session: Session = Depends(get_session)) -> dict:
     """Backfill daily history using Finnhub API."""
-    session = SessionLocal()
-    try:
-        result = finnhub_backfill_history(session, delay_seconds=1.0)
-        return {"ok": True, "result": result}
-    finally:
-        session.close()
+    result = finnhub_backfill_history(session)
+    return {"ok": True, "result": result}
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Request
+from operator import itemgetter
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
 from starlette.responses import RedirectResponse
 
-from app.db import SessionLocal
-from app.models import Industry, Stock
+from app.db import get_session
+from app.services.performance import industry_performance_select, sort_pct, stock_rows_select
 from app.services.updater import (
     compute_return_abs,
     compute_return_pct,
@@ -18,95 +21,73 @@ router = APIRouter()
 
 
 @router.get("/")
-def home(request: Request):
-    session = SessionLocal()
-    try:
-        stocks = session.query(Stock).all()
-        industries = session.query(Industry).all()
-
-        with_perf = []
-        for s in stocks:
-            with_perf.append(
-                {
-                    "id": s.id,
-                    "ticker": s.ticker,
-                    "name": s.name,
-                    "industry": s.industry.name if s.industry else None,
-                    "purchase_price": s.purchase_price,
-                    "last_price": s.last_price,
-                    "return_abs": compute_return_abs(s.purchase_price, s.last_price),
-                    "return_pct": compute_return_pct(s.purchase_price, s.last_price),
-                }
-            )
-
-        missing = [
-            s.ticker
-            for s in stocks
-            if (s.purchase_price is None) or (s.last_price is None)
-        ]
-
-        industry_rows = []
-        for ind in industries:
-            ind_stocks = [s for s in stocks if s.industry_id == ind.id]
-            returns = [compute_return_pct(s.purchase_price, s.last_price) for s in ind_stocks]
-            returns = [r for r in returns if r is not None]
-            avg_return = (sum(returns) / len(returns)) if returns else None
-            priced_in_industry = len([s for s in ind_stocks if s.last_price is not None])
-            industry_rows.append(
-                {
-                    "id": ind.id,
-                    "name": ind.name,
-                    "stock_count": len(ind_stocks),
-                    "priced_count": priced_in_industry,
-                    "avg_return_pct": avg_return,
-                }
-            )
-
-        def _stock_sort_key(r: dict) -> tuple[bool, float, str]:
-            rp = r.get("return_pct")
-            return (rp is None, -(float(rp) if rp is not None else 0.0), str(r.get("ticker") or ""))
-
-        def _industry_sort_key(r: dict) -> tuple[bool, float, str]:
-            rp = r.get("avg_return_pct")
-            return (rp is None, -(float(rp) if rp is not None else 0.0), str(r.get("name") or ""))
-
-        return templates.TemplateResponse(
-            "home.html",
+def home(request: Request, session: Session = Depends(get_session)):
+    industries = session.execute(industry_performance_select()).all()
+    ind_name_by_id = {ind.id: ind.name for ind in industries}
+    stocks = session.execute(stock_rows_select(with_industry=False)).all()
+
+    with_perf = []
+    for s in stocks:
+        pct = compute_return_pct(s.purchase_price, s.last_price)
+        with_perf.append(
+            {
+                "id": s.id,
+                "ticker": s.ticker,
+                "name": s.name,
+                "industry": ind_name_by_id.get(s.industry_id),
+                "purchase_price": s.purchase_price,
+                "last_price": s.last_price,
+                "return_abs": compute_return_abs(s.purchase_price, s.last_price),
+                "return_pct": pct,
+                "_sort_pct": sort_pct(pct),
+            }
+        )
+
+    missing = [
+        s.ticker
+        for s in stocks
+        if (s.purchase_price is None) or (s.last_price is None)
+    ]
+
+    industry_rows = []
+    for ind in industries:
+        industry_rows.append(
             {
-                "request": request,
-                "stock_count": len(stocks),
-                "industry_count": len(industries),
-                "priced_count": len([s for s in stocks if s.last_price is not None]),
-                "missing_count": len(missing),
-                "missing_tickers": ", ".join(sorted(missing)) if missing else "",
-                "industry_rows": sorted(industry_rows, key=_industry_sort_key),
-                "top": sorted(
-                    [x for x in with_perf if x["return_pct"] is not None],
-                    key=lambda x: x["return_pct"],
-                    reverse=True,
-                )[:5],
-                "rows": sorted(with_perf, key=_stock_sort_key),
-            },
+                "id": ind.id,
+                "name": ind.name,
+                "stock_count": ind.stock_count,
+                "priced_count": ind.priced_count,
+                "avg_return_pct": ind.avg_return_pct,
+                "_sort_pct": sort_pct(ind.avg_return_pct),
+            }
         )
-    finally:
-        session.close()
+
+    with_perf.sort(key=itemgetter("_sort_pct", "ticker"))
+    industry_rows.sort(key=itemgetter("_sort_pct", "name"))
+
+    return templates.TemplateResponse(
+        "home.html",
+        {
+            "request": request,
+            "stock_count": len(stocks),
+            "industry_count": len(industries),
+            "priced_count": len([s for s in stocks if s.last_price is not None]),
+            "missing_count": len(missing),
+            "missing_tickers": ", ".join(sorted(missing)) if missing else "",
+            "industry_rows": industry_rows,
+            "top": [x for x in with_perf if x["return_pct"] is not None][:5],
+            "rows": with_perf,
+        },
+    )
 
 
 @router.get("/update-now")
-def update_now(request: Request):
-    session = SessionLocal()
-    try:
-        finnhub_update_prices(session, delay_seconds=1.0)
-    finally:
-        session.close()
+def update_now(request: Request, session: Session = Depends(get_session)):
+    finnhub_update_prices(session)
     return RedirectResponse(url="/", status_code=303)
 
 
 @router.get("/backfill-now")
-def backfill_now(request: Request):
-    session = SessionLocal()
-    try:
-        finnhub_backfill_history(session, delay_seconds=1.0)
-    finally:
-        session.close()
+def backfill_now(request: Request, session: Session = Depends(get_session)):
+    finnhub_backfill_history(session)
     return RedirectResponse(url="/", status_code=303)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Request
-from sqlalchemy import select
+from operator import itemgetter
+from statistics import fmean
 
-from app.db import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import get_async_session, get_session
 from app.models import Industry, Stock
+from app.services.performance import industry_performance_select, sort_pct, stock_rows_select
 from app.services.updater import compute_return_pct
 from app.web import templates
 
@@ -13,68 +18,48 @@ router = APIRouter(prefix="/industries")
 
 
 @router.get("")
-def list_industries(request: Request):
-    session = SessionLocal()
-    try:
-        industries = session.execute(select(Industry)).scalars().all()
-        rows = []
-        for ind in industries:
-            stocks = session.execute(select(Stock).where(Stock.industry_id == ind.id)).scalars().all()
-            rets = [compute_return_pct(s.purchase_price, s.last_price) for s in stocks]
-            rets = [r for r in rets if r is not None]
-            avg = sum(rets) / len(rets) if rets else None
-            rows.append(
-                {
-                    "id": ind.id,
-                    "name": ind.name,
-                    "stock_count": len(stocks),
-                    "avg_return_pct": avg,
-                }
-            )
-
-        def _sort_key(r: dict) -> tuple[bool, float, str]:
-            rp = r.get("avg_return_pct")
-            return (rp is None, -(float(rp) if rp is not None else 0.0), str(r.get("name") or ""))
+async def list_industries(request: Request, session: AsyncSession = Depends(get_async_session)):
+    industries = (await session.execute(industry_performance_select())).all()
+    rows = []
+    for ind in industries:
+        rows.append(
+            {
+                "id": ind.id,
+                "name": ind.name,
+                "stock_count": ind.stock_count,
+                "avg_return_pct": ind.avg_return_pct,
+                "_sort_pct": sort_pct(ind.avg_return_pct),
+            }
+        )
 
-        rows = sorted(rows, key=_sort_key)
-        return templates.TemplateResponse("industries.html", {"request": request, "rows": rows})
-    finally:
-        session.close()
+    rows.sort(key=itemgetter("_sort_pct", "name"))
+    return templates.TemplateResponse("industries.html", {"request": request, "rows": rows})
 
 
 @router.get("/{industry_id}")
-def industry_detail(industry_id: int, request: Request):
-    session = SessionLocal()
-    try:
-        ind = session.get(Industry, industry_id)
-        if ind is None:
-            raise HTTPException(status_code=404, detail="Industry not found")
-        stocks = session.execute(select(Stock).where(Stock.industry_id == ind.id)).scalars().all()
-        rows = []
-        for s in stocks:
-            rows.append(
-                {
-                    "id": s.id,
-                    "ticker": s.ticker,
-                    "name": s.name,
-                    "purchase_price": s.purchase_price,
-                    "last_price": s.last_price,
-                    "return_pct": compute_return_pct(s.purchase_price, s.last_price),
-                }
-            )
-        rows = sorted(
-            rows,
-            key=lambda r: (
-                r["return_pct"] is None,
-                -(float(r["return_pct"]) if r["return_pct"] is not None else 0.0),
-                r["ticker"],
-            ),
-        )
-        rets = [r["return_pct"] for r in rows if r["return_pct"] is not None]
-        avg = sum(rets) / len(rets) if rets else None
-        return templates.TemplateResponse(
-            "industry_detail.html",
-            {"request": request, "industry": ind, "rows": rows, "avg_return_pct": avg},
+def industry_detail(industry_id: int, request: Request, session: Session = Depends(get_session)):
+    ind = session.get(Industry, industry_id)
+    if ind is None:
+        raise HTTPException(status_code=404, detail="Industry not found")
+    stocks = session.execute(stock_rows_select(with_industry=False).where(Stock.industry_id == ind.id)).all()
+    rows = []
+    for s in stocks:
+        pct = compute_return_pct(s.purchase_price, s.last_price)
+        rows.append(
+            {
+                "id": s.id,
+                "ticker": s.ticker,
+                "name": s.name,
+                "purchase_price": s.purchase_price,
+                "last_price": s.last_price,
+                "return_pct": pct,
+                "_sort_pct": sort_pct(pct),
+            }
         )
-    finally:
-        session.close()
+    rows.sort(key=itemgetter("_sort_pct", "ticker"))
+    rets = [r["return_pct"] for r in rows if r["return_pct"] is not None]
+    avg = fmean(rets) if rets else None
+    return templates.TemplateResponse(
+        "industry_detail.html",
+        {"request": request, "industry": ind, "rows": rows, "avg_return_pct": avg},
+    )
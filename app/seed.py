@@ -5,6 +5,7 @@ import datetime as dt
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.db import dialect_insert
 from app.models import Industry, Stock
 
 
@@ -12,14 +13,6 @@ PURCHASE_DATE = dt.date(2026, 1, 2)
 
 
 def seed_defaults(session: Session) -> None:
-    def ensure_industry(name: str) -> Industry:
-        ind = session.execute(select(Industry).where(Industry.name == name)).scalar_one_or_none()
-        if ind is None:
-            ind = Industry(name=name)
-            session.add(ind)
-            session.flush()
-        return ind
-
     # Note: "Sandisk" is not a currently traded standalone ticker in many markets.
     # Keeping SNDK as a best-effort; if Yahoo has no data it will be skipped during updates.
     seed_data: dict[str, list[tuple[str, str]]] = {
@@ -65,20 +58,29 @@ def seed_defaults(session: Session) -> None:
         ],
     }
 
-    existing_tickers = {t for (t,) in session.execute(select(Stock.ticker)).all()}
-
-    for industry_name, stocks in seed_data.items():
-        industry = ensure_industry(industry_name)
-        for ticker, name in stocks:
-            if ticker in existing_tickers:
-                continue
-            session.add(
-                Stock(
-                    ticker=ticker,
-                    name=name,
-                    industry_id=industry.id,
-                    purchase_date=PURCHASE_DATE,
-                    purchase_price=None,
-                )
-            )
-            existing_tickers.add(ticker)
+    # Idempotent bulk inserts: existing industries/tickers are left untouched by the DB.
+    session.execute(
+        dialect_insert(session, Industry)
+        .values([{"name": name} for name in seed_data])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    industry_ids = dict(
+        session.execute(select(Industry.name, Industry.id).where(Industry.name.in_(list(seed_data)))).all()
+    )
+    session.execute(
+        dialect_insert(session, Stock)
+        .values(
+            [
+                {
+                    "ticker": ticker,
+                    "name": name,
+                    "industry_id": industry_ids[industry_name],
+                    "purchase_date": PURCHASE_DATE,
+                    "purchase_price": None,
+                }
+                for industry_name, stocks in seed_data.items()
+                for ticker, name in stocks
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["ticker"])
+    )
@@ -5,28 +5,94 @@ Works from cloud servers (Render, etc).
 """
 from __future__ import annotations
 
+import logging
 import os
+import threading
 import time
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+import requests
+from requests.adapters import HTTPAdapter
+
 FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY", "d4jjfkhr01qgcb0tlt50d4jjfkhr01qgcb0tlt5g")
 FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
+MAX_CALLS_PER_MINUTE = 60
+# Finnhub also caps bursts at 30 calls/second, independently of the per-minute quota.
+MAX_CALLS_PER_SECOND = 30
+# Upper bound on a Retry-After wait after a 429.
+MAX_RETRY_AFTER = 60.0
+MAX_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe rolling-window limiter: at most `max_calls` per `period` seconds."""
+
+    def __init__(self, max_calls: int, period: float) -> None:
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+def _build_session() -> requests.Session:
+    # Keep-alive pool shared by all worker threads, so TLS setup is paid once per connection.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
+_SESSION = _build_session()
+_LIMITER = RateLimiter(MAX_CALLS_PER_MINUTE, 60.0)
+_BURST_LIMITER = RateLimiter(MAX_CALLS_PER_SECOND, 1.0)
 
-def get_quote(ticker: str) -> dict | None:
+
+def _retry_after(resp: requests.Response) -> float:
+    try:
+        return min(max(float(resp.headers.get("Retry-After", 1)), 0.0), MAX_RETRY_AFTER)
+    except ValueError:
+        # HTTP-date form; not worth parsing for a single retry
+        return 1.0
+
+
+def _get(session: requests.Session, path: str, params: dict) -> dict:
+    """GET a Finnhub endpoint within both rate limits, retrying a 429 once."""
+    for attempt in range(2):
+        _LIMITER.acquire()
+        _BURST_LIMITER.acquire()
+        resp = session.get(f"{FINNHUB_BASE_URL}{path}", params=params, timeout=10)
+        if resp.status_code != 429 or attempt:
+            break
+        time.sleep(_retry_after(resp))
+    resp.raise_for_status()
+    return resp.json()
+
+
+def get_quote(ticker: str, session: requests.Session | None = None) -> dict | None:
     """Get current quote for a single ticker.
     
     Returns dict with keys: c (current), h (high), l (low), o (open), pc (previous close), t (timestamp)
     """
+    session = session or _SESSION
     try:
-        resp = requests.get(
-            f"{FINNHUB_BASE_URL}/quote",
-            params={"symbol": ticker, "token": FINNHUB_API_KEY},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+        data = _get(session, "/quote", {"symbol": ticker, "token": FINNHUB_API_KEY})
         
         # Finnhub returns {"c":0,"d":null,"dp":null,...} for invalid tickers
         if data.get("c") == 0 and data.get("t") == 0:
@@ -34,28 +100,32 @@ def get_quote(ticker: str) -> dict | None:
         
         return data
     except Exception as e:
-        print(f"[finnhub] Error fetching {ticker}: {e}")
+        logger.warning("Error fetching %s: %s", ticker, e)
         return None
 
 
-def get_quotes_batch(tickers: list[str], delay_between: float = 0.5) -> dict[str, dict]:
-    """Get quotes for multiple tickers with rate limiting.
+def get_quotes_batch(tickers: list[str], max_workers: int = MAX_WORKERS) -> dict[str, dict]:
+    """Get quotes for multiple tickers concurrently.
+    
+    Requests share one pooled session and the module rate limiters (60/min and
+    30/s), so concurrency only hides network latency and never exceeds the API budget.
     
     Returns dict mapping ticker -> quote data
     """
-    results = {}
-    for i, ticker in enumerate(tickers):
-        if i > 0:
-            time.sleep(delay_between)  # Rate limit: 60/min = 1/sec max
-        
-        quote = get_quote(ticker)
-        if quote:
-            results[ticker] = quote
-    
-    return results
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        quotes = pool.map(get_quote, tickers)
+        return {ticker: quote for ticker, quote in zip(tickers, quotes) if quote}
 
 
-def get_candles(ticker: str, from_ts: int, to_ts: int, resolution: str = "D") -> list[tuple] | None:
+def get_candles(
+    ticker: str,
+    from_ts: int,
+    to_ts: int,
+    resolution: str = "D",
+    session: requests.Session | None = None,
+) -> list[tuple] | None:
     """Get historical candles for a ticker.
     
     Args:
@@ -66,36 +136,27 @@ def get_candles(ticker: str, from_ts: int, to_ts: int, resolution: str = "D") ->
     
     Returns list of (timestamp, open, high, low, close, volume) tuples
     """
+    session = session or _SESSION
     try:
-        resp = requests.get(
-            f"{FINNHUB_BASE_URL}/stock/candle",
-            params={
+        data = _get(
+            session,
+            "/stock/candle",
+            {
                 "symbol": ticker,
                 "resolution": resolution,
                 "from": from_ts,
                 "to": to_ts,
                 "token": FINNHUB_API_KEY,
             },
-            timeout=10,
         )
-        resp.raise_for_status()
-        data = resp.json()
         
         if data.get("s") == "no_data":
             return None
         
-        candles = []
-        for i in range(len(data.get("t", []))):
-            candles.append((
-                data["t"][i],  # timestamp
-                data["o"][i],  # open
-                data["h"][i],  # high
-                data["l"][i],  # low
-                data["c"][i],  # close
-                data["v"][i],  # volume
-            ))
-        
-        return candles
+        if not data.get("t"):
+            return []
+        # Columnar arrays -> row tuples in one C-level pass instead of indexing per bar
+        return list(zip(data["t"], data["o"], data["h"], data["l"], data["c"], data["v"]))
     except Exception as e:
-        print(f"[finnhub] Error fetching candles for {ticker}: {e}")
+        logger.warning("Error fetching candles for %s: %s", ticker, e)
         return None
@@ -0,0 +1,62 @@
+"""SQL-side performance aggregation shared by the list views."""
+from __future__ import annotations
+
+import math
+
+from sqlalchemy import Select, and_, case, func, select
+
+from app.models import Industry, Stock
+
+
+def sort_pct(pct: float | None) -> float:
+    """Precomputed sort key: highest return first, rows without a return last."""
+    return math.inf if pct is None else -pct
+
+
+def return_pct_expr():
+    """SQL counterpart of `compute_return_pct`; NULL prices propagate to NULL."""
+    return case(
+        (Stock.purchase_price == 0, None),
+        else_=(Stock.last_price - Stock.purchase_price) / Stock.purchase_price * 100.0,
+    )
+
+
+def stock_rows_select(*, with_industry: bool = True) -> Select:
+    """Column projection for stock list views; rows are plain tuples, not ORM objects.
+
+    Callers that already hold the industry list pass ``with_industry=False`` and map
+    ``industry_id`` to a name themselves, which skips the join.
+    """
+    columns = [
+        Stock.id,
+        Stock.ticker,
+        Stock.name,
+        Stock.industry_id,
+        Stock.purchase_date,
+        Stock.purchase_price,
+        Stock.last_price,
+        Stock.last_price_at,
+    ]
+    if not with_industry:
+        return select(*columns)
+    return select(*columns, Industry.name.label("industry")).join(
+        Industry, Stock.industry_id == Industry.id, isouter=True
+    )
+
+
+def industry_performance_select(*, active_only: bool = False) -> Select:
+    """One grouped query: (id, name, stock_count, priced_count, avg_return_pct) per industry."""
+    on = Stock.industry_id == Industry.id
+    if active_only:
+        on = and_(on, Stock.active == True)  # noqa: E712
+    return (
+        select(
+            Industry.id,
+            Industry.name,
+            func.count(Stock.id).label("stock_count"),
+            func.count(Stock.last_price).label("priced_count"),
+            func.avg(return_pct_expr()).label("avg_return_pct"),
+        )
+        .join(Stock, on, isouter=True)
+        .group_by(Industry.id, Industry.name)
+    )
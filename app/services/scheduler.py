@@ -1,28 +1,36 @@
 from __future__ import annotations
 
+import logging
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from app.config import settings
+from app.config import get_settings
 from app.db import SessionLocal
 from app.services.updater import finnhub_update_prices
 
 
+logger = logging.getLogger(__name__)
+
+
 def start_scheduler() -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler(timezone="UTC")
 
+    # Deliberately synchronous: AsyncIOScheduler hands plain functions to the loop's
+    # default thread pool (run_in_executor), so the blocking HTTP and DB work here never
+    # runs on the event loop. A coroutine job would run *on* the loop instead.
     def _job() -> None:
-        print("[scheduler] Starting hourly price update via Finnhub...")
+        logger.info("Starting hourly price update via Finnhub")
         session = SessionLocal()
         try:
-            finnhub_update_prices(session, delay_seconds=1.0)
+            finnhub_update_prices(session)
         finally:
             session.close()
-        print("[scheduler] Hourly update complete.")
+        logger.info("Hourly update complete")
 
     scheduler.add_job(
         _job,
         trigger="interval",
-        minutes=settings.update_interval_minutes,
+        minutes=get_settings().update_interval_minutes,
         id="price-updater",
         replace_existing=True,
         coalesce=True,
@@ -2,10 +2,10 @@
 from __future__ import annotations
 
 import datetime as dt
-import time
+import logging
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 
 from app.config import DATA_DIR
@@ -13,14 +13,90 @@ from app.models import PricePoint, Stock
 from app.services import finnhub
 
 
+logger = logging.getLogger(__name__)
+
+_UTC = dt.timezone.utc
+
 _LAST_UPDATE_FILE = DATA_DIR / "last_update_utc.txt"
+# Tickers written per transaction in finnhub_update_prices.
+COMMIT_EVERY = 25
+
+# Bumped whenever prices are written, so read-side caches know to rebuild.
+_data_version = 0
+
+
+def data_version() -> int:
+    return _data_version
+
+
+def _bump_data_version() -> None:
+    global _data_version
+    _data_version += 1
+
+
+# Active stocks as id -> (ticker, naive-UTC last_price_at), reused across scheduler ticks.
+# Whatever adds or removes stocks calls invalidate_stock_cache(); the updater keeps
+# last_price_at current itself as it writes.
+_stock_cache: dict[int, tuple[str, dt.datetime | None]] = {}
+_stock_cache_version = 0
+_stock_cache_built_for = -1
+
+
+def invalidate_stock_cache() -> None:
+    global _stock_cache_version
+    _stock_cache_version += 1
+
+
+def _active_stocks(session: Session) -> dict[int, tuple[str, dt.datetime | None]]:
+    global _stock_cache, _stock_cache_built_for
+    version = _stock_cache_version
+    if _stock_cache_built_for != version:
+        rows = session.execute(
+            select(Stock.id, Stock.ticker, Stock.last_price_at).where(Stock.active == True)  # noqa: E712
+        ).all()
+        _stock_cache = {
+            stock_id: (ticker, last_price_at and _normalize_observed_at(last_price_at))
+            for stock_id, ticker, last_price_at in rows
+        }
+        _stock_cache_built_for = version
+    return _stock_cache
+
+
+# One prepared UPDATE, executed once per batch with a parameter set per stock.
+_UPDATE_LAST_PRICE = (
+    update(Stock.__table__)
+    .where(Stock.__table__.c.id == bindparam("s_id"))
+    .values(last_price=bindparam("lp"), last_price_at=bindparam("lpa"))
+)
+
+
+def _commit_prices(session: Session, price_rows: list[dict], stock_rows: list[dict]) -> None:
+    try:
+        PricePoint.bulk_upsert(session, price_rows)
+        if stock_rows:
+            session.execute(_UPDATE_LAST_PRICE, stock_rows)
+        session.commit()
+        price_rows.clear()
+        stock_rows.clear()
+    except Exception:
+        # The cache may already hold timestamps that never made it to the database.
+        invalidate_stock_cache()
+        raise
 
 
 def _normalize_observed_at(value: dt.datetime) -> dt.datetime:
     """Normalize datetimes to naive UTC for SQLite storage and comparisons."""
     if value.tzinfo is not None:
-        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
-    return value.replace(microsecond=0)
+        value = value.astimezone(_UTC)
+    return value.replace(tzinfo=None, microsecond=0)
+
+
+_EPOCH = dt.datetime(1970, 1, 1)
+
+
+def _utc_naive_from_epoch(ts: int) -> dt.datetime:
+    """Naive UTC datetime for a Unix timestamp, without a tz-aware round trip."""
+    return _EPOCH + dt.timedelta(seconds=int(ts))
 
 
 def _recently_updated(within_seconds: int) -> bool:
@@ -54,30 +130,31 @@ def compute_return_abs(purchase: float | None, current: float | None) -> float |
     return current - purchase
 
 
-def finnhub_update_prices(session: Session, *, delay_seconds: float = 1.0) -> dict[str, int]:
+def finnhub_update_prices(session: Session) -> dict[str, int]:
     """Update prices using Finnhub API - works from cloud servers like Render.
     
-    Finnhub free tier: 60 calls/minute, so 1 second delay is safe.
+    Quotes are fetched concurrently up front; the finnhub module's rate limiter
+    bursts up to the free tier's 60 calls/minute and only then paces requests.
     """
     updated = 0
     skipped = 0
     failed = 0
 
-    stocks = session.execute(select(Stock).where(Stock.active == True)).scalars().all()  # noqa: E712
+    stocks = _active_stocks(session)
     if not stocks:
         return {"updated": 0, "skipped": 0, "failed": 0}
 
-    print(f"[finnhub_update] Starting update for {len(stocks)} stocks...")
+    logger.info("Starting update for %d stocks", len(stocks))
+    quotes = finnhub.get_quotes_batch([ticker for ticker, _ in stocks.values()])
+    price_rows: list[dict] = []
+    stock_rows: list[dict] = []
     
-    for i, stock in enumerate(stocks):
-        if i > 0:
-            time.sleep(delay_seconds)
-        
+    for i, (stock_id, (ticker, stored_time)) in enumerate(list(stocks.items())):
         try:
-            quote = finnhub.get_quote(stock.ticker)
+            quote = quotes.get(ticker)
             
             if not quote or quote.get("c") == 0:
-                print(f"[finnhub_update] {stock.ticker}: no data")
+                logger.info("%s: no data", ticker)
                 skipped += 1
                 continue
             
@@ -85,42 +162,36 @@ def finnhub_update_prices(session: Session, *, delay_seconds: float = 1.0) -> di
             timestamp = quote.get("t", 0)  # Unix timestamp
             
             if timestamp:
-                observed_at = dt.datetime.fromtimestamp(timestamp, tz=dt.timezone.utc).replace(tzinfo=None)
+                observed_at = _utc_naive_from_epoch(timestamp)
             else:
-                observed_at = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
-            
-            # Normalize stored last_price_at to naive UTC for comparison
-            stored_time = stock.last_price_at
-            if stored_time and stored_time.tzinfo is not None:
-                stored_time = stored_time.astimezone(dt.timezone.utc).replace(tzinfo=None)
+                observed_at = dt.datetime.now(_UTC).replace(tzinfo=None)
             
             # Skip if we already have this or newer
             if stored_time and observed_at <= stored_time:
-                print(f"[finnhub_update] {stock.ticker}: already up to date")
+                logger.info("%s: already up to date", ticker)
                 skipped += 1
                 continue
             
-            # Add price point
-            session.add(
-                PricePoint(
-                    stock_id=stock.id,
-                    observed_at=observed_at,
-                    price=price,
-                )
-            )
-            stock.last_price = price
-            stock.last_price_at = observed_at
-            session.commit()
+            price_rows.append({"stock_id": stock_id, "observed_at": observed_at, "price": price})
+            stock_rows.append({"s_id": stock_id, "lp": price, "lpa": observed_at})
+            stocks[stock_id] = (ticker, observed_at)
             
-            print(f"[finnhub_update] {stock.ticker}: ${price:.2f}")
+            logger.info("%s: $%.2f", ticker, price)
             updated += 1
             
         except Exception as e:
-            print(f"[finnhub_update] {stock.ticker}: error - {e}")
+            logger.warning("%s: error - %s", ticker, e)
             failed += 1
+        
+        # Checkpoint periodically so a crash late in the run keeps earlier prices.
+        if (i + 1) % COMMIT_EVERY == 0:
+            _commit_prices(session, price_rows, stock_rows)
     
+    _commit_prices(session, price_rows, stock_rows)
+    if updated:
+        _bump_data_version()
     _mark_updated_now()
-    print(f"[finnhub_update] Done: {updated} updated, {skipped} skipped, {failed} failed")
+    logger.info("Update done: %d updated, %d skipped, %d failed", updated, skipped, failed)
     return {"updated": updated, "skipped": skipped, "failed": failed}
 
 
@@ -128,13 +199,14 @@ def finnhub_backfill_history(
     session: Session,
     *,
     start_date: dt.date | None = None,
-    delay_seconds: float = 1.0,
 ) -> dict[str, int]:
     """Backfill daily history using Finnhub candles API.
     
     WARNING: Finnhub free tier does NOT have access to candles endpoint (403 Forbidden).
     This function will fail. Use only finnhub_update_prices() which uses the quote endpoint.
     """
-    print("[finnhub_backfill] ERROR: Finnhub free tier does not support candles endpoint")
-    print("[finnhub_backfill] Use finnhub_update_prices() to fetch current prices instead")
+    # Return before touching the API: a 403 per stock would only drain the shared
+    # rate limiter that finnhub_update_prices depends on.
+    logger.error("Finnhub free tier does not support candles endpoint")
+    logger.error("Use finnhub_update_prices() to fetch current prices instead")
     return {"inserted": 0, "skipped": 0, "failed": 0}
@@ -9,15 +9,13 @@ from app.models import PricePoint, Stock
 def main() -> None:
     session = SessionLocal()
     try:
-        total_stocks = session.scalar(select(func.count()).select_from(Stock))
-        with_purchase = session.scalar(
-            select(func.count()).select_from(Stock).where(Stock.purchase_price.is_not(None))
-        )
-        with_last = session.scalar(
-            select(func.count()).select_from(Stock).where(Stock.last_price.is_not(None))
-        )
-        pp_count = session.scalar(select(func.count()).select_from(PricePoint))
-        latest_pp = session.execute(select(func.max(PricePoint.observed_at))).scalar_one()
+        # COUNT(column) skips NULLs, so one scan per table answers all the counts.
+        total_stocks, with_purchase, with_last = session.execute(
+            select(func.count(), func.count(Stock.purchase_price), func.count(Stock.last_price)).select_from(Stock)
+        ).one()
+        pp_count, latest_pp = session.execute(
+            select(func.count(), func.max(PricePoint.observed_at)).select_from(PricePoint)
+        ).one()
 
         print("stocks_total", total_stocks)
         print("stocks_with_purchase", with_purchase)
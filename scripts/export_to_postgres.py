@@ -13,13 +13,15 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, insert, select, text
 from sqlalchemy.orm import Session
 
 from app.models import Base, Industry, Stock, PricePoint
 
 # Local SQLite database
 LOCAL_DB_URL = "sqlite:///./data/app.db"
+# Price points sent per executemany/commit
+BATCH_SIZE = 10_000
 
 
 def main():
@@ -62,12 +64,14 @@ def main():
         industries = local_session.query(Industry).all()
         print(f"\nExporting {len(industries)} industries...")
         
-        industry_id_map = {}  # local_id -> remote_id
+        # One multi-row INSERT ... RETURNING gives back the new ids, keyed by the unique name
+        remote_ids = remote_session.execute(
+            insert(Industry).returning(Industry.id, Industry.name),
+            [{"name": ind.name} for ind in industries],
+        ).all() if industries else []
+        remote_industry_by_name = {name: remote_id for remote_id, name in remote_ids}
+        industry_id_map = {ind.id: remote_industry_by_name[ind.name] for ind in industries}  # local_id -> remote_id
         for ind in industries:
-            new_industry = Industry(name=ind.name)
-            remote_session.add(new_industry)
-            remote_session.flush()
-            industry_id_map[ind.id] = new_industry.id
             print(f"  {ind.name}")
         remote_session.commit()
         
@@ -75,44 +79,57 @@ def main():
         stocks = local_session.query(Stock).all()
         print(f"\nExporting {len(stocks)} stocks...")
         
-        stock_id_map = {}  # local_id -> remote_id
+        remote_ids = remote_session.execute(
+            insert(Stock).returning(Stock.id, Stock.ticker),
+            [
+                {
+                    "ticker": s.ticker,
+                    "name": s.name,
+                    "industry_id": industry_id_map[s.industry_id],
+                    "purchase_date": s.purchase_date,
+                    "purchase_price": s.purchase_price,
+                    "purchase_currency": s.purchase_currency,
+                    "last_price": s.last_price,
+                    "last_price_at": s.last_price_at,
+                    "last_currency": s.last_currency,
+                    "active": s.active,
+                }
+                for s in stocks
+            ],
+        ).all() if stocks else []
+        remote_stock_by_ticker = {ticker: remote_id for remote_id, ticker in remote_ids}
+        stock_id_map = {s.id: remote_stock_by_ticker[s.ticker] for s in stocks}  # local_id -> remote_id
         for s in stocks:
-            new_stock = Stock(
-                ticker=s.ticker,
-                name=s.name,
-                industry_id=industry_id_map[s.industry_id],
-                purchase_date=s.purchase_date,
-                purchase_price=s.purchase_price,
-                purchase_currency=s.purchase_currency,
-                last_price=s.last_price,
-                last_price_at=s.last_price_at,
-                last_currency=s.last_currency,
-                active=s.active,
-            )
-            remote_session.add(new_stock)
-            remote_session.flush()
-            stock_id_map[s.id] = new_stock.id
             print(f"  {s.ticker}: purchase={s.purchase_price}, last={s.last_price}")
         remote_session.commit()
         
-        # Copy price points
-        price_points = local_session.query(PricePoint).all()
-        print(f"\nExporting {len(price_points)} price points...")
+        # Copy price points, streamed so only one chunk is held in memory at a time
+        total = local_session.scalar(select(func.count()).select_from(PricePoint))
+        print(f"\nExporting {total} price points...")
         
-        batch_size = 500
-        for i, pp in enumerate(price_points):
-            remote_session.add(PricePoint(
-                stock_id=stock_id_map[pp.stock_id],
-                observed_at=pp.observed_at,
-                price=pp.price,
-                currency=pp.currency,
-            ))
-            if (i + 1) % batch_size == 0:
-                remote_session.commit()
-                print(f"  {i + 1}/{len(price_points)} exported...")
+        result = local_session.execute(
+            select(PricePoint.stock_id, PricePoint.observed_at, PricePoint.price, PricePoint.currency)
+        ).yield_per(BATCH_SIZE)
+        exported = 0
+        # Core executemany: SQLAlchemy batches each chunk into multi-VALUES INSERTs
+        for chunk in result.partitions():
+            remote_session.execute(
+                insert(PricePoint),
+                [
+                    {
+                        "stock_id": stock_id_map[stock_id],
+                        "observed_at": observed_at,
+                        "price": price,
+                        "currency": currency,
+                    }
+                    for stock_id, observed_at, price, currency in chunk
+                ],
+            )
+            remote_session.commit()
+            exported += len(chunk)
+            print(f"  {exported}/{total} exported...")
         
-        remote_session.commit()
-        print(f"  {len(price_points)}/{len(price_points)} exported!")
+        print(f"  {exported}/{total} exported!")
     
     print("\n✅ Export complete!")
     print("\nNext steps:")
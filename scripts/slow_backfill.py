@@ -1,6 +1,6 @@
 #!/usr/bin/env python
-"""Slow backfill script that fetches one ticker at a time with delays to avoid rate limits."""
-import time
+"""Backfill script that fetches tickers in batches, backing off when Yahoo pushes back."""
+import asyncio
 import random
 import sys
 import os
@@ -8,74 +8,189 @@ import os
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import pandas as pd
 import yfinance as yf
-from datetime import date, datetime, timezone, timedelta
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
 from app.db import SessionLocal
 from app.models import Stock, PricePoint
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 
-def main():
-    session = SessionLocal()
-    stocks = session.execute(select(Stock).where(Stock.active == True)).scalars().all()
+# Tickers per yf.download call, and downloads per batch before giving up on a ticker
+BATCH_SIZE = 25
+MAX_ATTEMPTS = 4
+# Fetched batches waiting on the writer; bounds how far downloads run ahead of writes
+QUEUE_SIZE = 8
 
-    print(f'Fetching data for {len(stocks)} stocks one at a time with delays...')
-    start_date = date(2026, 1, 2)
-    end_date = date.today() + timedelta(days=1)
-    success = 0
-    failed = 0
 
-    for i, stock in enumerate(stocks):
-        print(f'[{i+1}/{len(stocks)}] {stock.ticker}...', end=' ', flush=True)
+def fetch_batch(tickers, start_date, end_date):
+    # One multi-ticker download; columns come back as (ticker, field)
+    return yf.download(
+        tickers=' '.join(tickers),
+        start=start_date,
+        end=end_date,
+        interval='1d',
+        auto_adjust=False,
+        group_by='ticker',
+        threads=True,
+        progress=False,
+    )
+
+
+def ticker_frame(df, ticker, only_ticker=False):
+    """One ticker's bars from a grouped download, minus the rows padded in for other tickers."""
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        if ticker not in df.columns.get_level_values(0):
+            return None
+        frame = df[ticker]
+    elif only_ticker:
+        # yfinance before 0.2.51 returns flat columns for a one-ticker download
+        frame = df
+    else:
+        return None
+    if 'Close' not in frame.columns:
+        return None
+    return frame.dropna(subset=['Close'])
+
+
+async def fetch_with_backoff(tickers, start_date, end_date):
+    """Download a batch, re-requesting tickers that come back missing.
+
+    yf.download swallows per-ticker failures (rate limits included) and just leaves
+    those tickers out of the frame, so a missing ticker is the signal to back off.
+    Returns (ticker -> frame, last exception if the final attempt raised).
+    """
+    frames = {}
+    missing = list(tickers)
+    error = None
+    for attempt in range(MAX_ATTEMPTS):
+        if attempt:
+            # Exponential backoff with jitter before re-requesting the missing tickers
+            await asyncio.sleep(2 ** (attempt - 1) * 5 + random.uniform(0, 3))
         try:
-            # Wait 5-8 seconds between each ticker
-            time.sleep(5 + random.uniform(0, 3))
-            t = yf.Ticker(stock.ticker)
-            df = t.history(start=start_date, end=end_date, interval='1d', auto_adjust=False)
-            
-            if df is None or df.empty or 'Close' not in df.columns:
-                print('no data')
-                failed += 1
+            # yfinance is blocking; run it in a worker thread so the writer keeps going
+            df = await asyncio.to_thread(fetch_batch, missing, start_date, end_date)
+            error = None
+        except Exception as e:
+            error = e
+            continue
+        for ticker in missing:
+            frame = ticker_frame(df, ticker, only_ticker=len(missing) == 1)
+            if frame is not None and not frame.empty:
+                frames[ticker] = frame
+        missing = [ticker for ticker in missing if ticker not in frames]
+        if not missing:
+            break
+    return frames, error
+
+
+async def produce(queue, batches, start_date, end_date):
+    # One download at a time: yf.download keeps its results in module-level state that
+    # concurrent calls clobber, and threads=True already parallelises within a batch.
+    for batch in batches:
+        frames, error = await fetch_with_backoff([s.ticker for s in batch], start_date, end_date)
+        await queue.put((batch, frames, error))
+    await queue.put(None)
+
+
+def write_history(session, stock, df):
+    """Store one ticker's bars and update its prices, returning the rows inserted."""
+    # Convert the whole index and Close column at once instead of walking iterrows();
+    # aware timestamps keep their exchange wall-clock time, as before.
+    index = df.index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    times = index.floor('s').to_pydatetime()
+    prices = df['Close'].to_numpy(dtype='float64').tolist()
+    rows = [
+        {'stock_id': stock.id, 'observed_at': observed_at, 'price': price}
+        for observed_at, price in zip(times, prices)
+    ]
+
+    # One UPDATE per ticker instead of dirtying the ORM object
+    values = {}
+    # Set purchase price if needed: first bar on/after the purchase date
+    first = bisect_left(times, datetime.combine(stock.purchase_date, datetime.min.time()))
+    if first < len(prices):
+        values['purchase_price'] = func.coalesce(Stock.purchase_price, prices[first])
+
+    # History is returned oldest-first, so the final bar is the latest price
+    if stock.last_price_at is None or times[-1] >= stock.last_price_at:
+        values['last_price'] = prices[-1]
+        values['last_price_at'] = times[-1]
+
+    if values:
+        session.execute(update(Stock).where(Stock.id == stock.id).values(**values))
+
+    # Rows already stored are skipped by the (stock_id, observed_at) unique constraint
+    inserted = PricePoint.bulk_upsert(session, rows)
+    session.commit()
+    return inserted
+
+
+def write_batch(session, batch, frames, batch_error):
+    """Write one fetched batch, returning (ticker, message, ok) per stock."""
+    outcomes = []
+    for stock in batch:
+        try:
+            frame = frames.get(stock.ticker)
+            if frame is None:
+                if batch_error is not None:
+                    raise batch_error
+                outcomes.append((stock.ticker, 'no data', False))
                 continue
-            
-            # Get existing timestamps to avoid duplicates
-            existing = set()
-            for pp in stock.prices:
-                existing.add(pp.observed_at)
-            
-            inserted = 0
-            for idx, row in df.iterrows():
-                observed_at = idx.to_pydatetime()
-                if observed_at.tzinfo is None:
-                    observed_at = observed_at.replace(tzinfo=timezone.utc)
-                observed_at = observed_at.replace(tzinfo=None, microsecond=0)
-                
-                if observed_at in existing:
-                    continue
-                
-                price = float(row['Close'])
-                session.add(PricePoint(stock_id=stock.id, observed_at=observed_at, price=price))
-                existing.add(observed_at)
-                inserted += 1
-                
-                # Set purchase price if needed
-                if stock.purchase_price is None and observed_at.date() >= stock.purchase_date:
-                    stock.purchase_price = price
-                
-                # Update last price
-                if stock.last_price_at is None or observed_at >= stock.last_price_at:
-                    stock.last_price = price
-                    stock.last_price_at = observed_at
-            
-            session.commit()
-            print(f'+{inserted}')
-            success += 1
+
+            inserted = write_history(session, stock, frame)
+            outcomes.append((stock.ticker, f'+{inserted}', True))
         except Exception as e:
-            print(f'error: {e}')
-            failed += 1
+            session.rollback()
+            outcomes.append((stock.ticker, f'error: {e}', False))
+    return outcomes
+
+
+async def writer(session, queue, total):
+    """Single consumer: all writes go through one session, one batch at a time."""
+    done = success = failed = 0
+    while (item := await queue.get()) is not None:
+        # Blocking DB work runs off the event loop so fetches keep being scheduled
+        for ticker, message, ok in await asyncio.to_thread(write_batch, session, *item):
+            done += 1
+            print(f'[{done}/{total}] {ticker}...', message)
+            if ok:
+                success += 1
+            else:
+                failed += 1
+    return success, failed
+
+
+async def main_async():
+    session = SessionLocal()
+    # Plain rows rather than ORM instances: the fetcher reads tickers on the event loop
+    # while the writer's session (whose rollback would expire instances) runs in a thread.
+    stocks = session.execute(
+        select(Stock.id, Stock.ticker, Stock.purchase_date, Stock.last_price_at).where(Stock.active == True)
+    ).all()
+
+    print(f'Fetching data for {len(stocks)} stocks in batches of {BATCH_SIZE}...')
+    start_date = date(2026, 1, 2)
+    end_date = date.today() + timedelta(days=1)
+
+    # The fetcher feeds a single writer, so downloads overlap with database writes
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    write_task = asyncio.create_task(writer(session, queue, len(stocks)))
+    batches = [stocks[i:i + BATCH_SIZE] for i in range(0, len(stocks), BATCH_SIZE)]
+    await produce(queue, batches, start_date, end_date)
+    success, failed = await write_task
 
     session.close()
     print(f'\nDone: {success} succeeded, {failed} failed')
 
 
+def main():
+    asyncio.run(main_async())
+
+
 if __name__ == '__main__':
     main()
@@ -9,6 +9,8 @@ Usage:
     export RENDER_DATABASE_URL="postgres://..."
     python scripts/sync_to_render.py
 """
+import datetime as dt
+import logging
 import os
 import sys
 from pathlib import Path
@@ -16,14 +18,85 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, select, text
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
 from app.models import Base, Industry, Stock, PricePoint
-from app.services.updater import slow_update_prices
+from app.services.updater import finnhub_update_prices
 
 LOCAL_DB_URL = "sqlite:///./data/app.db"
+# Price points per executemany call and per streamed fetch; bounds memory use
+INSERT_BATCH_SIZE = 10_000
+# Batches larger than this go through COPY into a staging table on Postgres
+COPY_THRESHOLD = 5_000
+
+UPDATE_STOCK = text("""
+    UPDATE stocks
+    SET last_price = :last_price,
+        last_price_at = :last_price_at,
+        purchase_price = COALESCE(purchase_price, :purchase_price)
+    WHERE ticker = :ticker
+""")
+
+INSERT_PRICE_POINT = text("""
+    INSERT INTO price_points (stock_id, observed_at, price, currency)
+    VALUES (:stock_id, :observed_at, :price, :currency)
+    ON CONFLICT (stock_id, observed_at) DO NOTHING
+""")
+
+MERGE_STAGED_PRICE_POINTS = """
+    INSERT INTO price_points (stock_id, observed_at, price, currency)
+    SELECT stock_id, observed_at, price, currency FROM price_points_staging
+    ON CONFLICT (stock_id, observed_at) DO NOTHING
+"""
+
+# Typed through the models so the watermark comes back as a datetime on any backend
+REMOTE_WATERMARKS = select(
+    Stock.id,
+    Stock.ticker,
+    select(func.max(PricePoint.observed_at))
+    .where(PricePoint.stock_id == Stock.id)
+    .scalar_subquery(),
+)
+
+
+def naive_utc(value):
+    """Postgres hands back aware timestamps; the local SQLite copy stores naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def copy_price_points(conn, rows):
+    """COPY rows into a temp staging table, then merge them into price_points.
+
+    Conflicts are resolved by the INSERT ... SELECT, so a row that already exists
+    on the remote doesn't abort the COPY.
+    """
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS price_points_staging ON COMMIT DROP AS "
+            "SELECT stock_id, observed_at, price, currency FROM price_points WITH NO DATA"
+        )
+        cursor.execute("TRUNCATE price_points_staging")
+        with cursor.copy(
+            "COPY price_points_staging (stock_id, observed_at, price, currency) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row((row["stock_id"], row["observed_at"], row["price"], row["currency"]))
+        cursor.execute(MERGE_STAGED_PRICE_POINTS)
+    finally:
+        cursor.close()
+
+
+def insert_price_points(conn, rows):
+    """Insert a batch of price points, skipping ones the remote already has."""
+    if conn.dialect.name == "postgresql" and len(rows) > COPY_THRESHOLD:
+        copy_price_points(conn, rows)
+    else:
+        conn.execute(INSERT_PRICE_POINT, rows)
 
 
 def normalize_postgres_url(url: str) -> str:
@@ -42,74 +115,78 @@ def sync_to_postgres(postgres_url: str):
     print(f"\n📤 Syncing to Postgres...")
     
     local_engine = create_engine(LOCAL_DB_URL)
-    remote_engine = create_engine(postgres_url)
+    # Render's Postgres is across the WAN: keep a small pool, drop dead or stale
+    # connections before use, and run the whole sync on one connection
+    remote_engine = create_engine(
+        postgres_url,
+        pool_size=5,
+        max_overflow=0,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
     
-    with Session(local_engine) as local_session, Session(remote_engine) as remote_session:
+    with Session(local_engine) as local_session, remote_engine.begin() as remote_conn:
         # Sync stocks (update existing, prices and timestamps)
-        local_stocks = local_session.query(Stock).all()
+        local_stocks = local_session.execute(select(Stock)).scalars().all()
         
-        for ls in local_stocks:
-            # Update remote stock with latest price info
-            remote_session.execute(
-                text("""
-                    UPDATE stocks 
-                    SET last_price = :last_price,
-                        last_price_at = :last_price_at,
-                        purchase_price = COALESCE(purchase_price, :purchase_price)
-                    WHERE ticker = :ticker
-                """),
-                {
-                    "ticker": ls.ticker,
-                    "last_price": ls.last_price,
-                    "last_price_at": ls.last_price_at,
-                    "purchase_price": ls.purchase_price,
-                }
+        # Update remote stocks with latest price info in one executemany call
+        if local_stocks:
+            remote_conn.execute(
+                UPDATE_STOCK,
+                [
+                    {
+                        "ticker": ls.ticker,
+                        "last_price": ls.last_price,
+                        "last_price_at": ls.last_price_at,
+                        "purchase_price": ls.purchase_price,
+                    }
+                    for ls in local_stocks
+                ],
             )
         
         # Sync new price points
-        # Get max timestamp per stock from remote
-        remote_max_times = {}
-        rows = remote_session.execute(
-            text("SELECT stock_id, MAX(observed_at) as max_time FROM price_points GROUP BY stock_id")
-        ).fetchall()
-        for row in rows:
-            remote_max_times[row[0]] = row[1]
-        
-        # Get ticker to remote stock_id mapping
+        # Get ticker to remote stock_id mapping along with each stock's latest
+        # remote timestamp; the correlated MAX is one index probe per stock
+        # rather than a GROUP BY over the whole price_points table
         ticker_to_remote_id = {}
-        for row in remote_session.execute(text("SELECT id, ticker FROM stocks")).fetchall():
-            ticker_to_remote_id[row[1]] = row[0]
+        remote_max_times = {}
+        for remote_id, ticker, max_time in remote_conn.execute(REMOTE_WATERMARKS):
+            ticker_to_remote_id[ticker] = remote_id
+            remote_max_times[remote_id] = naive_utc(max_time)
         
-        # Insert new price points
+        # Stream only the price points newer than the remote's latest, inserting
+        # them in batches as they arrive
+        pending = []
         new_points = 0
         for ls in local_stocks:
             remote_stock_id = ticker_to_remote_id.get(ls.ticker)
             if not remote_stock_id:
                 continue
                 
+            query = select(
+                PricePoint.observed_at, PricePoint.price, PricePoint.currency
+            ).where(PricePoint.stock_id == ls.id)
             remote_max = remote_max_times.get(remote_stock_id)
+            if remote_max:
+                query = query.where(PricePoint.observed_at > remote_max)
             
-            for pp in ls.prices:
-                # Skip if already exists (based on timestamp)
-                if remote_max and pp.observed_at <= remote_max:
-                    continue
-                
-                remote_session.execute(
-                    text("""
-                        INSERT INTO price_points (stock_id, observed_at, price, currency)
-                        VALUES (:stock_id, :observed_at, :price, :currency)
-                        ON CONFLICT (stock_id, observed_at) DO NOTHING
-                    """),
-                    {
-                        "stock_id": remote_stock_id,
-                        "observed_at": pp.observed_at,
-                        "price": pp.price,
-                        "currency": pp.currency,
-                    }
-                )
-                new_points += 1
+            rows = local_session.execute(query.execution_options(yield_per=INSERT_BATCH_SIZE))
+            for observed_at, price, currency in rows:
+                pending.append({
+                    "stock_id": remote_stock_id,
+                    "observed_at": observed_at,
+                    "price": price,
+                    "currency": currency,
+                })
+                if len(pending) >= INSERT_BATCH_SIZE:
+                    insert_price_points(remote_conn, pending)
+                    new_points += len(pending)
+                    pending = []
+        
+        if pending:
+            insert_price_points(remote_conn, pending)
+            new_points += len(pending)
         
-        remote_session.commit()
         print(f"✅ Synced {len(local_stocks)} stocks, {new_points} new price points")
 
 
@@ -126,9 +203,10 @@ def main():
         sys.exit(1)
     
     # Step 1: Fetch latest prices locally
-    print("📊 Fetching latest prices from Yahoo Finance...")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    print("📊 Fetching latest prices from Finnhub...")
     with SessionLocal() as session:
-        result = slow_update_prices(session, delay_seconds=5.0)
+        result = finnhub_update_prices(session)
         print(f"✅ Updated: {result['updated']}, Skipped: {result['skipped']}, Failed: {result['failed']}")
     
     # Step 2: Sync to Render's Postgres